@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
 from datetime import datetime, date
 import plotly.express as px
@@ -14,8 +15,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 커스텀 CSS
-st.markdown("""
+# 커스텀 CSS (한 번 생성 후 캐시에서 재사용)
+@st.cache_resource
+def _inject_css():
+    st.markdown("""
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -43,14 +46,34 @@ st.markdown("""
         font-weight: bold;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
+    return True
+
+_inject_css()
+
+# 거래처 목록
+SHOPS = ["원더조이", "뚜샵", "코스블라", "온리", "여진", "소연"]
 
 # 데이터베이스 초기화
 def init_db():
     conn = sqlite3.connect('lolo_shop.db', check_same_thread=False)
     c = conn.cursor()
     
-    # 거래 내역 테이블
+    # 쓰기 성능 설정 (WAL 모드, 커밋마다 fsync 하지 않음)
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA mmap_size=268435456")
+    c.execute("PRAGMA cache_size=-20000")
+    
+    # 기존 DB 마이그레이션: 저장된 month 열을 생성 열로 바꾸기 위해 테이블 재생성
+    month_info = [row for row in c.execute("PRAGMA table_xinfo(transactions)") if row[1] == 'month']
+    migrate_month = bool(month_info) and month_info[0][6] == 0
+    if migrate_month:
+        c.execute("BEGIN")
+        c.execute("ALTER TABLE transactions RENAME TO transactions_old")
+    
+    # 거래 내역 테이블 (month는 date에서 계산되는 생성 열)
     c.execute('''
         CREATE TABLE IF NOT EXISTS transactions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,11 +84,25 @@ def init_db():
             unit_price INTEGER NOT NULL,
             total INTEGER NOT NULL,
             transaction_type TEXT NOT NULL,
-            month TEXT NOT NULL,
+            month TEXT GENERATED ALWAYS AS (substr(date, 1, 7)) VIRTUAL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    if migrate_month:
+        c.execute('''
+            INSERT INTO transactions (id, date, shop, product_name, quantity, unit_price, total, transaction_type, created_at)
+            SELECT id, date, shop, product_name, quantity, unit_price, total, transaction_type, created_at
+            FROM transactions_old
+        ''')
+        c.execute('''
+            UPDATE sqlite_sequence
+            SET seq = (SELECT seq FROM sqlite_sequence WHERE name = 'transactions_old')
+            WHERE name = 'transactions'
+        ''')
+        c.execute("DROP TABLE transactions_old")
+        conn.commit()
+    
     # 상품 정보 테이블
     c.execute('''
         CREATE TABLE IF NOT EXISTS products (
@@ -77,6 +114,14 @@ def init_db():
         )
     ''')
     
+    # 조회 필터/정렬용 인덱스
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tx_month ON transactions(month)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tx_shop ON transactions(shop)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tx_type ON transactions(transaction_type)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tx_month_shop_type ON transactions(month, shop, transaction_type)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions(date DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_prod_name ON products(product_name)")
+    
     conn.commit()
     return conn
 
@@ -91,14 +136,24 @@ conn = get_connection()
 def add_transaction(date, shop, product_name, quantity, unit_price, transaction_type):
     c = conn.cursor()
     total = quantity * unit_price
-    month = date.strftime('%Y-%m')
     
     c.execute('''
-        INSERT INTO transactions (date, shop, product_name, quantity, unit_price, total, transaction_type, month)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (date.strftime('%Y-%m-%d'), shop, product_name, quantity, unit_price, total, transaction_type, month))
+        INSERT INTO transactions (date, shop, product_name, quantity, unit_price, total, transaction_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (date.strftime('%Y-%m-%d'), shop, product_name, quantity, unit_price, total, transaction_type))
     
     conn.commit()
+    clear_data_cache()
+    return True
+
+# 거래 내역 일괄 추가 (rows: (date, shop, product_name, quantity, unit_price, total, transaction_type))
+def add_transactions_bulk(rows):
+    with conn:
+        conn.executemany('''
+            INSERT INTO transactions (date, shop, product_name, quantity, unit_price, total, transaction_type)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    clear_data_cache()
     return True
 
 # 상품 추가/업데이트
@@ -113,14 +168,29 @@ def upsert_product(product_name, sku, supply_price):
                 supply_price = excluded.supply_price
         ''', (product_name, sku, supply_price))
         conn.commit()
+        clear_data_cache()
         return True
     except Exception as e:
         st.error(f"오류: {e}")
         return False
 
-# 데이터 조회
-def get_transactions(month=None, shop=None, transaction_type=None):
-    query = "SELECT * FROM transactions WHERE 1=1"
+# 상품 일괄 추가/업데이트 (rows: (product_name, sku, supply_price))
+def upsert_products_bulk(rows):
+    with conn:
+        conn.executemany('''
+            INSERT INTO products (product_name, sku, supply_price)
+            VALUES (?, ?, ?)
+            ON CONFLICT(sku) DO UPDATE SET
+                product_name = excluded.product_name,
+                supply_price = excluded.supply_price
+        ''', rows)
+    clear_data_cache()
+    return True
+
+# 데이터 조회 (필터별로 캐시, 데이터 변경 시 clear_data_cache()로 무효화)
+@st.cache_data(ttl=300, show_spinner=False)
+def get_transactions(month=None, shop=None, transaction_type=None, limit=None, columns=None):
+    query = f"SELECT {columns or '*'} FROM transactions WHERE 1=1"
     params = []
     
     if month:
@@ -134,21 +204,105 @@ def get_transactions(month=None, shop=None, transaction_type=None):
         params.append(transaction_type)
     
     query += " ORDER BY date DESC"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    
+    cur = conn.execute(query, params)
+    df = pd.DataFrame.from_records(cur.fetchall(), columns=[d[0] for d in cur.description])
+    
+    # 거래 금액이 int32 범위 안이면 int32로 저장 (메모리 절반), 넘으면 int64 유지
+    if 'total' in df.columns:
+        df['total'] = df['total'].astype('int64')
+        if df['total'].abs().max() <= np.iinfo(np.int32).max:
+            df['total'] = df['total'].astype('int32')
     
-    return pd.read_sql_query(query, conn, params=params)
+    # 값 종류가 적은 열은 category로 변환 (비교/groupby 속도 향상)
+    for col in ('shop', 'transaction_type'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+# 샵별 누적 통계 (집계는 SQLite에서 처리)
+@st.cache_data(ttl=300, show_spinner=False)
+def get_shop_stats():
+    return pd.read_sql_query('''
+        SELECT
+            shop,
+            SUM(CASE WHEN transaction_type = 'lend' THEN total ELSE 0 END) AS lend,
+            SUM(CASE WHEN transaction_type = 'borrow' THEN total ELSE 0 END) AS borrow,
+            SUM(CASE WHEN transaction_type = 'lend' THEN total ELSE -total END) AS net
+        FROM transactions
+        GROUP BY shop
+        ORDER BY shop
+    ''', conn)
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_products():
     return pd.read_sql_query("SELECT * FROM products ORDER BY product_name", conn)
 
+# 거래 입력 폼용 {상품명: 공급가} 조회표
+@st.cache_data(ttl=300, show_spinner=False)
+def _product_price_map():
+    df = get_products().drop_duplicates('product_name')
+    return dict(zip(df['product_name'], df['supply_price'].astype(int).tolist()))
+
+# 거래 내역 목록 표 (필터별로 캐시)
+@st.cache_data(ttl=300, show_spinner=False)
+def build_tx_display(month, shop, transaction_type):
+    df = get_transactions(
+        month, shop, transaction_type,
+        columns="id, date, shop, product_name, quantity, unit_price, total, transaction_type"
+    )
+    
+    df['거래유형'] = df['transaction_type'].map({'lend': '빌려줌 (+)', 'borrow': '빌림 (-)'})
+    amt_str = df['total'].map(lambda v: f"{v:,}").astype(str)
+    df['금액'] = np.where(df['transaction_type'].values == 'lend', '₩' + amt_str, '-₩' + amt_str)
+    
+    display_cols = ['date', 'shop', 'product_name', 'quantity', 'unit_price', '거래유형', '금액', 'id']
+    df_show = df[display_cols]
+    df_show.columns = ['날짜', '거래처', '상품명', '수량', '단가', '거래유형', '금액', 'ID']
+    
+    return df_show
+
+# 조회 캐시 무효화
+def clear_data_cache():
+    get_transactions.clear()
+    get_shop_stats.clear()
+    get_products.clear()
+    _product_price_map.clear()
+    build_tx_display.clear()
+
 def delete_transaction(transaction_id):
     c = conn.cursor()
     c.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
     conn.commit()
+    clear_data_cache()
 
 def delete_all_products():
-    c = conn.cursor()
-    c.execute("DELETE FROM products")
-    conn.commit()
+    with conn:
+        conn.execute("DELETE FROM products")
+    clear_data_cache()
+
+# CSV 열 이름 키워드
+PRODUCT_KEYWORDS = ('상품명', 'product', 'name')
+SKU_KEYWORDS = ('sku', '코드')
+PRICE_KEYWORDS = ('공급가', '가격', 'price', 'supply')
+
+TX_DATE_KEYWORDS = ('날짜', 'date')
+TX_SHOP_KEYWORDS = ('거래처', 'shop')
+TX_PRODUCT_KEYWORDS = ('상품명', 'product')
+TX_QUANTITY_KEYWORDS = ('수량', 'quantity', 'qty')
+TX_PRICE_KEYWORDS = ('단가', 'price')
+TX_TYPE_KEYWORDS = ('유형', 'type')
+
+# 키워드가 포함된 첫 번째 열 찾기 (앞에서 이미 찾은 열은 제외)
+def _find_column(lower_cols, keywords, used):
+    col = next((c for c, low in lower_cols.items() if c not in used and any(k in low for k in keywords)), None)
+    if col is not None:
+        used.add(col)
+    return col
 
 # CSV 업로드 처리
 def process_csv(csv_file):
@@ -156,46 +310,132 @@ def process_csv(csv_file):
         df = pd.read_csv(csv_file)
         
         # 열 이름 찾기
-        product_col = None
-        sku_col = None
-        price_col = None
-        
-        for col in df.columns:
-            col_lower = col.lower()
-            if '상품명' in col or 'product' in col_lower or 'name' in col_lower:
-                product_col = col
-            elif 'sku' in col_lower or '코드' in col:
-                sku_col = col
-            elif '공급가' in col or '가격' in col or 'price' in col_lower or 'supply' in col_lower:
-                price_col = col
+        lower_cols = {col: str(col).lower() for col in df.columns}
+        used = set()
+        product_col = _find_column(lower_cols, PRODUCT_KEYWORDS, used)
+        sku_col = _find_column(lower_cols, SKU_KEYWORDS, used)
+        price_col = _find_column(lower_cols, PRICE_KEYWORDS, used)
         
         if not all([product_col, sku_col, price_col]):
             return None, "필수 열(상품명, SKU, 공급가)을 찾을 수 없습니다."
         
-        success_count = 0
-        error_count = 0
-        
-        for _, row in df.iterrows():
-            product_name = str(row[product_col]).strip()
-            sku = str(row[sku_col]).strip()
-            price_str = str(row[price_col]).replace(',', '').replace('원', '').strip()
-            
-            try:
-                price = int(float(price_str))
-            except:
-                error_count += 1
-                continue
-            
-            if product_name and sku and price > 0:
-                if upsert_product(product_name, sku, price):
-                    success_count += 1
-                else:
-                    error_count += 1
-        
-        return success_count, error_count
+        # 열 단위 정리 (행별 반복 없이 한 번에 처리)
+        names = df[product_col].fillna('').astype(str).str.strip()
+        skus = df[sku_col].fillna('').astype(str).str.strip()
+        prices = pd.to_numeric(
+            df[price_col].astype(str)
+            .str.replace(',', '', regex=False)
+            .str.replace('원', '', regex=False)
+            .str.strip(),
+            errors='coerce'
+        )
+        
+        ok = names.ne('') & skus.ne('') & prices.notna() & prices.gt(0)
+        rows = list(zip(names[ok], skus[ok], prices[ok].astype(int).tolist()))
+        
+        # 하나의 트랜잭션으로 일괄 저장
+        upsert_products_bulk(rows)
+        
+        return len(rows), int((~ok).sum())
+    except Exception as e:
+        return None, str(e)
+
+# 거래 내역 CSV 업로드 처리
+def process_transactions_csv(csv_file):
+    try:
+        df = pd.read_csv(csv_file)
+        
+        # 열 이름 찾기
+        lower_cols = {col: str(col).lower() for col in df.columns}
+        used = set()
+        date_col = _find_column(lower_cols, TX_DATE_KEYWORDS, used)
+        shop_col = _find_column(lower_cols, TX_SHOP_KEYWORDS, used)
+        product_col = _find_column(lower_cols, TX_PRODUCT_KEYWORDS, used)
+        quantity_col = _find_column(lower_cols, TX_QUANTITY_KEYWORDS, used)
+        price_col = _find_column(lower_cols, TX_PRICE_KEYWORDS, used)
+        type_col = _find_column(lower_cols, TX_TYPE_KEYWORDS, used)
+        
+        if not all([date_col, shop_col, product_col, quantity_col, price_col, type_col]):
+            return None, "필수 열(날짜, 거래처, 상품명, 수량, 단가, 거래유형)을 찾을 수 없습니다."
+        
+        # 열 단위 정리
+        dates = pd.to_datetime(df[date_col], errors='coerce')
+        shops = df[shop_col].fillna('').astype(str).str.strip()
+        products = df[product_col].fillna('').astype(str).str.strip()
+        quantities = pd.to_numeric(df[quantity_col].astype(str).str.replace(',', '', regex=False).str.strip(), errors='coerce')
+        prices = pd.to_numeric(
+            df[price_col].astype(str)
+            .str.replace(',', '', regex=False)
+            .str.replace('원', '', regex=False)
+            .str.strip(),
+            errors='coerce'
+        )
+        
+        # 'lend'/'빌려줌 (+)' → lend, 'borrow'/'빌림 (-)' → borrow
+        types = df[type_col].fillna('').astype(str).str.strip().str.lower()
+        tx_types = pd.Series(
+            np.select(
+                [types.str.contains('lend|빌려줌'), types.str.contains('borrow|빌림')],
+                ['lend', 'borrow'],
+                default=''
+            ),
+            index=df.index
+        )
+        
+        # 거래처는 등록된 목록(SHOPS)에 있는 이름만 허용, 수량/단가는 정수만 허용
+        ok = (dates.notna() & shops.isin(SHOPS) & products.ne('') & tx_types.ne('')
+              & quantities.gt(0) & prices.gt(0)
+              & quantities.mod(1).eq(0) & prices.mod(1).eq(0))
+        
+        quantities = quantities[ok].astype(int)
+        prices = prices[ok].astype(int)
+        rows = list(zip(
+            dates[ok].dt.strftime('%Y-%m-%d'),
+            shops[ok],
+            products[ok],
+            quantities.tolist(),
+            prices.tolist(),
+            (quantities * prices).tolist(),
+            tx_types[ok]
+        ))
+        
+        add_transactions_bulk(rows)
+        
+        return len(rows), int((~ok).sum())
     except Exception as e:
         return None, str(e)
 
+# 시계열 차트 다운샘플링 (LTTB) - 선택된 점의 인덱스 반환
+def downsample_lttb(x, y, n_out=500):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    # 첫/마지막 점은 고정, 나머지는 n_out - 2개 구간에서 하나씩 선택
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i < n_out - 3:
+            avg_x = x[edges[i + 1]:edges[i + 2]].mean()
+            avg_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        
+        # 이전 선택점, 다음 구간 평균점과 만드는 삼각형 넓이가 최대인 점
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    
+    return idx
+
 # 메인 앱
 def main():
     # 헤더
@@ -234,20 +474,19 @@ def show_dashboard():
         if st.button("🔄 새로고침", use_container_width=True):
             st.rerun()
     
-    # 데이터 조회
-    df = get_transactions(month=selected_month)
+    # 데이터 조회 (집계에 필요한 열만)
+    df = get_transactions(month=selected_month, columns="shop, total, transaction_type")
     
     if df.empty:
         st.info("이번 달 거래 내역이 없습니다.")
         return
     
-    # 총 정산 금액 계산
-    total_balance = 0
-    for _, row in df.iterrows():
-        if row['transaction_type'] == 'lend':
-            total_balance += row['total']
-        else:
-            total_balance -= row['total']
+    # 총 정산 금액 계산 (빌려줌 여부 마스크 하나로 모든 합계 계산)
+    tot = df['total'].to_numpy(dtype=np.int64)
+    is_lend = df['transaction_type'].to_numpy() == 'lend'
+    lend_total = int(tot[is_lend].sum())
+    borrow_total = int(tot[~is_lend].sum())
+    total_balance = lend_total - borrow_total
     
     # 메트릭 표시
     col1, col2, col3 = st.columns(3)
@@ -260,11 +499,9 @@ def show_dashboard():
         )
     
     with col2:
-        lend_total = df[df['transaction_type'] == 'lend']['total'].sum()
         st.metric("빌려준 총액", f"₩{lend_total:,}")
     
     with col3:
-        borrow_total = df[df['transaction_type'] == 'borrow']['total'].sum()
         st.metric("빌린 총액", f"₩{borrow_total:,}")
     
     st.divider()
@@ -272,19 +509,16 @@ def show_dashboard():
     # 샵별 정산 현황
     st.subheader("🏪 샵별 정산 현황")
     
-    shop_balances = {}
-    for _, row in df.iterrows():
-        shop = row['shop']
-        if shop not in shop_balances:
-            shop_balances[shop] = 0
-        
-        if row['transaction_type'] == 'lend':
-            shop_balances[shop] += row['total']
-        else:
-            shop_balances[shop] -= row['total']
+    # 정산 금액 절댓값이 큰 순서
+    shop_balances = (
+        pd.Series(np.where(is_lend, tot, -tot), index=df.index)
+        .groupby(df['shop'], observed=True)
+        .sum()
+        .sort_values(key=np.abs, ascending=False)
+    )
     
-    if shop_balances:
-        for shop, balance in sorted(shop_balances.items(), key=lambda x: abs(x[1]), reverse=True):
+    if not shop_balances.empty:
+        for shop, balance in shop_balances.items():
             col1, col2 = st.columns([2, 1])
             with col1:
                 st.write(f"**{shop}**")
@@ -297,12 +531,14 @@ def show_dashboard():
     # 최근 거래 내역
     st.subheader("📝 최근 거래 내역 (10건)")
     
-    recent_df = df.head(10).copy()
-    recent_df['거래유형'] = recent_df['transaction_type'].map({'lend': '빌려줌 (+)', 'borrow': '빌림 (-)'})
-    recent_df['금액'] = recent_df.apply(
-        lambda x: f"₩{x['total']:,}" if x['transaction_type'] == 'lend' else f"-₩{x['total']:,}",
-        axis=1
+    recent_df = get_transactions(
+        month=selected_month,
+        limit=10,
+        columns="date, shop, product_name, quantity, total, transaction_type"
     )
+    recent_df['거래유형'] = recent_df['transaction_type'].map({'lend': '빌려줌 (+)', 'borrow': '빌림 (-)'})
+    amt_str = recent_df['total'].map(lambda v: f"{v:,}").astype(str)
+    recent_df['금액'] = np.where(recent_df['transaction_type'].values == 'lend', '₩' + amt_str, '-₩' + amt_str)
     
     display_df = recent_df[['date', 'shop', 'product_name', 'quantity', '거래유형', '금액']]
     display_df.columns = ['날짜', '거래처', '상품명', '수량', '거래유형', '금액']
@@ -323,7 +559,7 @@ def show_transactions():
         with col2:
             tx_shop = st.selectbox(
                 "거래처",
-                ["원더조이", "뚜샵", "코스블라", "온리", "여진", "소연"]
+                SHOPS
             )
         
         with col3:
@@ -336,16 +572,11 @@ def show_transactions():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            products_df = get_products()
-            if not products_df.empty:
-                product_options = products_df['product_name'].tolist()
+            price_map = _product_price_map()
+            if price_map:
+                product_options = list(price_map)
                 tx_product = st.selectbox("상품명", [""] + product_options)
-                
-                if tx_product:
-                    selected_product = products_df[products_df['product_name'] == tx_product].iloc[0]
-                    default_price = int(selected_product['supply_price'])
-                else:
-                    default_price = 0
+                default_price = price_map.get(tx_product, 0)
             else:
                 tx_product = st.text_input("상품명")
                 default_price = 0
@@ -364,6 +595,37 @@ def show_transactions():
             else:
                 st.error("모든 필드를 입력해주세요.")
     
+    # CSV 업로드
+    with st.expander("📁 CSV 파일로 거래 내역 불러오기"):
+        st.info("💡 필수 열: 날짜, 거래처, 상품명, 수량, 단가, 거래유형 (lend/borrow 또는 빌려줌/빌림). "
+                f"거래처는 {', '.join(SHOPS)} 중 하나여야 합니다.")
+        
+        # 업로드 성공 시 key를 바꿔 파일을 비움 (같은 거래가 두 번 저장되지 않도록)
+        tx_csv_file = st.file_uploader(
+            "거래 내역 CSV 파일 선택",
+            type=['csv'],
+            key=f"tx_csv_{st.session_state.get('tx_csv_key', 0)}"
+        )
+        
+        if tx_csv_file is not None:
+            if st.button("📤 거래 내역 업로드", type="primary", use_container_width=True):
+                with st.spinner("처리 중..."):
+                    success, error = process_transactions_csv(tx_csv_file)
+                    
+                    if success is not None:
+                        st.session_state['tx_csv_result'] = (
+                            f"✅ {success}건의 거래가 저장되었습니다!" + 
+                            (f" ({error}건 실패)" if error > 0 else "")
+                        )
+                        st.session_state['tx_csv_key'] = st.session_state.get('tx_csv_key', 0) + 1
+                        st.rerun()
+                    else:
+                        st.error(f"❌ 오류: {error}")
+    
+    # 직전 업로드 결과 (rerun 후에 표시)
+    if 'tx_csv_result' in st.session_state:
+        st.success(st.session_state.pop('tx_csv_result'))
+    
     st.divider()
     
     # 거래 내역 조회
@@ -376,33 +638,22 @@ def show_transactions():
         filter_month = st.text_input("월 필터 (YYYY-MM)", placeholder="예: 2026-01")
     
     with col2:
-        filter_shop = st.selectbox("거래처 필터", ["전체"] + ["원더조이", "뚜샵", "코스블라", "온리", "여진", "소연"])
+        filter_shop = st.selectbox("거래처 필터", ["전체"] + SHOPS)
     
     with col3:
         filter_type = st.selectbox("거래 유형 필터", ["전체", "lend", "borrow"],
                                     format_func=lambda x: x if x == "전체" else "빌려줌 (+)" if x == "lend" else "빌림 (-)")
     
     # 데이터 조회
-    df = get_transactions(
-        month=filter_month if filter_month else None,
-        shop=filter_shop if filter_shop != "전체" else None,
-        transaction_type=filter_type if filter_type != "전체" else None
+    df_show = build_tx_display(
+        filter_month if filter_month else None,
+        filter_shop if filter_shop != "전체" else None,
+        filter_type if filter_type != "전체" else None
     )
     
-    if df.empty:
+    if df_show.empty:
         st.info("거래 내역이 없습니다.")
     else:
-        df_display = df.copy()
-        df_display['거래유형'] = df_display['transaction_type'].map({'lend': '빌려줌 (+)', 'borrow': '빌림 (-)'})
-        df_display['금액'] = df_display.apply(
-            lambda x: f"₩{x['total']:,}" if x['transaction_type'] == 'lend' else f"-₩{x['total']:,}",
-            axis=1
-        )
-        
-        display_cols = ['date', 'shop', 'product_name', 'quantity', 'unit_price', '거래유형', '금액', 'id']
-        df_show = df_display[display_cols]
-        df_show.columns = ['날짜', '거래처', '상품명', '수량', '단가', '거래유형', '금액', 'ID']
-        
         st.dataframe(df_show, use_container_width=True, hide_index=True)
         
         # 삭제 기능
@@ -463,15 +714,13 @@ def show_products():
     with col1:
         st.subheader("📋 상품 목록")
     with col2:
-        if st.button("🗑️ 전체 삭제", type="secondary", use_container_width=True):
-            if st.session_state.get('confirm_delete'):
+        # 확인 버튼은 팝오버 안에서만 표시, 클릭 시에만 삭제 실행
+        with st.popover("🗑️ 전체 삭제", use_container_width=True):
+            st.warning("모든 상품이 삭제됩니다.")
+            if st.button("삭제 확인", type="primary", use_container_width=True):
                 delete_all_products()
                 st.success("모든 상품이 삭제되었습니다!")
-                st.session_state['confirm_delete'] = False
                 st.rerun()
-            else:
-                st.session_state['confirm_delete'] = True
-                st.warning("다시 한 번 클릭하면 삭제됩니다.")
     
     products_df = get_products()
     
@@ -531,48 +780,31 @@ def show_statistics():
     # 샵별 누적 통계
     st.subheader("🏪 샵별 누적 통계 (전체 기간)")
     
-    all_df = get_transactions()
-    
-    if not all_df.empty:
-        shop_stats = {}
-        for _, row in all_df.iterrows():
-            shop = row['shop']
-            if shop not in shop_stats:
-                shop_stats[shop] = {'lend': 0, 'borrow': 0, 'net': 0}
-            
-            if row['transaction_type'] == 'lend':
-                shop_stats[shop]['lend'] += row['total']
-                shop_stats[shop]['net'] += row['total']
-            else:
-                shop_stats[shop]['borrow'] += row['total']
-                shop_stats[shop]['net'] -= row['total']
-        
+    stats_df = get_shop_stats()
+    
+    if not stats_df.empty:
         # 차트 데이터 준비
-        chart_data = []
-        for shop, stats in shop_stats.items():
-            chart_data.append({
-                '거래처': shop,
-                '빌려준 금액': stats['lend'],
-                '빌린 금액': stats['borrow'],
-                '순 정산': stats['net']
-            })
-        
-        chart_df = pd.DataFrame(chart_data)
+        chart_df = stats_df.rename(columns={
+            'shop': '거래처',
+            'lend': '빌려준 금액',
+            'borrow': '빌린 금액',
+            'net': '순 정산'
+        }).astype({'빌려준 금액': 'int64', '빌린 금액': 'int64', '순 정산': 'int64'})
         
         # 막대 그래프
         fig = go.Figure()
         
         fig.add_trace(go.Bar(
             name='빌려준 금액',
-            x=chart_df['거래처'],
-            y=chart_df['빌려준 금액'],
+            x=chart_df['거래처'].values,
+            y=chart_df['빌려준 금액'].values,
             marker_color='#10b981'
         ))
         
         fig.add_trace(go.Bar(
             name='빌린 금액',
-            x=chart_df['거래처'],
-            y=chart_df['빌린 금액'],
+            x=chart_df['거래처'].values,
+            y=chart_df['빌린 금액'].values,
             marker_color='#ef4444'
         ))
         